@@ -0,0 +1,206 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+
+# logger all game events are emitted through
+logger = logging.getLogger("el_capitan")
+logger.propagate = False
+
+# background listener draining the event queue into the sinks
+_listener = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formats an event record as a single line of JSON
+    """
+
+    def format(self, record):
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "event": getattr(record, "event", record.getMessage()),
+        }
+        entry.update(getattr(record, "fields", {}))
+
+        return json.dumps(entry, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """
+    Formats an event record as the human-readable terminal output
+    """
+
+    def format(self, record):
+        event = getattr(record, "event", record.getMessage())
+        fields = getattr(record, "fields", {})
+
+        renderer = _CONSOLE_RENDERERS.get(event)
+        if renderer:
+            return renderer(fields)
+
+        details = " ".join(f"{key}={value}" for key, value in fields.items())
+        return f"{event}: {details}" if details else event
+
+
+def _render_game_start(fields):
+    return f"Starting game {fields['game']}"
+
+
+def _render_turn(fields):
+    lines = [
+        "",
+        f"Planet:  {fields['planet']}",
+        f"Turns:  {fields['turns_left']} \tCredits:  {fields['credits']}",
+    ]
+    lines.extend(fields["transactions"])
+    lines.append("\n")
+
+    return "\n".join(lines)
+
+
+def _render_game_end(fields):
+    result = (
+        "***** High score achieved *****"
+        if fields["high_score"]
+        else "***** End of game *****"
+    )
+
+    return (
+        f"Sold cargo for a total of {fields['sell_profit']}\n"
+        f"Final score: {fields['final_score']}\n"
+        f"{result}\n"
+    )
+
+
+def _render_transaction_error(fields):
+    lines = [
+        "",
+        f"**** {fields['action']} error! ****",
+        fields["attempt"],
+        "**** GAME ****",
+    ]
+    lines.extend(f"{key}: {value}" for key, value in fields["state"].items())
+
+    if "hold" in fields:
+        lines.append("**** HOLD ****")
+        lines.extend(f"{key}: {value}" for key, value in fields["hold"].items())
+
+    return "\n".join(lines) + "\n"
+
+
+def _render_fuel_error(fields):
+    return "Not enough credits for fuel cells"
+
+
+_CONSOLE_RENDERERS = {
+    "game_start": _render_game_start,
+    "turn": _render_turn,
+    "game_end": _render_game_end,
+    "transaction_error": _render_transaction_error,
+    "fuel_error": _render_fuel_error,
+}
+
+
+def configure(
+    quiet=False,
+    level=logging.INFO,
+    log_file=None,
+    max_bytes=5_000_000,
+    backup_count=3,
+    buffer_size=256,
+):
+    """
+    Sets up the event pipeline: events are queued by the caller and written by a
+    background thread to a buffered, rotating JSON-lines file and (unless quiet) to
+    the terminal in human-readable form
+    :param quiet: True to disable the terminal sink
+    :param level: minimum level of events to record
+    :param log_file: path of the JSON-lines event file, defaults to one per process
+    since rotation isn't safe with several processes sharing a file
+    :param max_bytes: size in bytes at which the event file is rotated
+    :param backup_count: number of rotated event files to keep
+    :param buffer_size: number of events buffered before writing to the event file
+    """
+    global _listener
+
+    shutdown()
+
+    if log_file is None:
+        log_file = f"events-{os.getpid()}.jsonl"
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=max_bytes, backupCount=backup_count, delay=True
+    )
+    file_handler.setFormatter(JsonLinesFormatter())
+
+    # error reports flush the buffer right away so they aren't lost on a crash
+    sinks = [
+        logging.handlers.MemoryHandler(
+            buffer_size, flushLevel=logging.ERROR, target=file_handler
+        )
+    ]
+
+    if not quiet:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(ConsoleFormatter())
+        sinks.append(console_handler)
+
+    event_queue = queue.SimpleQueue()
+
+    logger.handlers.clear()
+    logger.addHandler(logging.handlers.QueueHandler(event_queue))
+    logger.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(event_queue, *sinks)
+    _listener.start()
+
+
+def emit(event, level=logging.INFO, **fields):
+    """
+    Records a structured event
+    :param event: string name of the event
+    :param level: logging level of the event
+    :param fields: event data as keyword arguments
+    """
+    logger.log(level, event, extra={"event": event, "fields": fields})
+
+
+def enabled(level):
+    """
+    Checks if events of a level are recorded, so costly event data can be skipped
+    :param level: logging level of the event
+    :return: True if events of the level are recorded, else False
+    """
+    return logger.isEnabledFor(level)
+
+
+def shutdown():
+    """
+    Drains queued events, flushes buffered sinks and stops the background writer
+    """
+    global _listener
+
+    if _listener is None:
+        return
+
+    _listener.stop()
+
+    for handler in _listener.handlers:
+        # closing a memory handler flushes it and detaches its target
+        target = getattr(handler, "target", None)
+        handler.close()
+        if target:
+            target.close()
+
+    logger.handlers.clear()
+    _listener = None
+
+
+# flush buffered events even if play ends with an exception
+atexit.register(shutdown)
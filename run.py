@@ -1,5 +1,9 @@
+import argparse
+import events
+import logging
 import requests
 import services
+import state
 
 
 # web address base for request types
@@ -12,99 +16,111 @@ game_over = False
 # number of games played
 game_count = 0
 
+# command line options
+parser = argparse.ArgumentParser(description="Plays Sky Smuggler automatically")
+parser.add_argument(
+    "-q", "--quiet", action="store_true", help="don't print events to the terminal"
+)
+parser.add_argument(
+    "--log-level",
+    default="INFO",
+    choices=["DEBUG", "INFO", "ERROR"],
+    help="minimum level of events to record (ERROR records only error reports)",
+)
+parser.add_argument(
+    "--log-file",
+    help="JSON-lines file events are written to (default: events-<pid>.jsonl); "
+    "concurrent runs must each use their own file",
+)
+args = parser.parse_args()
+
+# event pipeline
+events.configure(
+    quiet=args.quiet, level=getattr(logging, args.log_level), log_file=args.log_file
+)
+
 # data file
 data_file = open("data.txt", "a")
 
 # region play
 while not end_play:
-    print(f"Starting game {game_count + 1}")
-    # start new game and get json object
-    game = requests.get(web_base.format(action="new_game")).json()
-    # get game id
-    game_id = game["gameId"]
+    events.emit("game_start", game=game_count + 1)
+    # start new game and build its persistent state
+    game_state = state.GameState(
+        requests.get(web_base.format(action="new_game")).json()
+    )
     while not game_over:
         transactions = []
 
-        # parse game data
-        (
-            planet,
-            game_credits,
-            turns_left,
-            market,
-            hold,
-            fuel_purchases,
-            loan,
-            cargo_bays,
-            bank_balance,
-        ) = services.get_game_data(game)
-
         # check for low cargo event
-        low_cargo = services.is_low_market_event(market)
+        low_cargo = services.is_low_market_event(game_state.market)
 
         # sell all cargo
-        sell_profit = services.sell_cargo(game_id, hold, market)
-        cargo_bays_used = 0
+        sell_profit = services.sell_cargo(game_state)
         transactions.append(f"Cargo sale profit: {sell_profit}")
-        game_credits += sell_profit
 
         # buy fuel cells
-        if services.should_buy_fuel_cells(planet, turns_left, fuel_purchases):
-            bought_cells, game_credits = services.try_buy_fuel_cells(
-                game_id, game_credits
-            )
-            if bought_cells:
+        if services.should_buy_fuel_cells(
+            game_state.planet, game_state.turns_left, game_state.fuel_purchases
+        ):
+            if services.try_buy_fuel_cells(game_state):
                 transactions.append("Bought 5 more turns")
-                turns_left += 5
 
         # repay loan
-        if services.should_repay_loan(planet, loan, low_cargo):
-            game_credits, loan = services.try_repay_loan(game_id, game_credits, loan)
+        if services.should_repay_loan(game_state.planet, game_state.loan, low_cargo):
+            services.try_repay_loan(game_state)
 
-        if loan:
-            transactions.append(f"Loan balance: {loan}")
+        if game_state.loan:
+            transactions.append(f"Loan balance: {game_state.loan}")
 
         # withdraw from bank
         bank_withdrawal = False
 
-        if planet == "earth" and bank_balance:
-            game_credits, bank_balance = services.try_bank_transaction(
-                game_id, bank_balance, "withdraw"
+        if game_state.planet == "earth" and game_state.bank_balance:
+            bank_withdrawal = (
+                services.try_bank_transaction(
+                    game_state, game_state.bank_balance, "withdraw"
+                )
+                and not game_state.bank_balance
             )
-            bank_withdrawal = not bank_balance
 
         # buy cargo
         cargo_to_buy = services.choose_cargo_to_buy(
-            market, game_credits, cargo_bays_used, cargo_bays
+            game_state.market,
+            game_state.credits,
+            game_state.used_bays,
+            game_state.cargo_bays,
         )
         if cargo_to_buy:
-            game_credits, hold, cargo_amount_bought = services.try_buy_cargo(
-                game_id, cargo_to_buy, market, game_credits, cargo_bays_used, cargo_bays
-            )
+            cargo_price = game_state.market[cargo_to_buy]
+            cargo_amount_bought = services.try_buy_cargo(game_state, cargo_to_buy)
 
             # add notification
             if cargo_amount_bought:
                 transactions.append(
-                    f"Bought {cargo_amount_bought} {cargo_to_buy} at {market[cargo_to_buy]} each"
+                    f"Bought {cargo_amount_bought} {cargo_to_buy} at {cargo_price} each"
                 )
 
         # deposit to bank
-        if services.should_deposit(planet, bank_withdrawal, game_credits):
-            deposit_amount = game_credits if bank_withdrawal else game_credits * 0.5
-            game_credits, bank_balance = services.try_bank_transaction(
-                game_id, deposit_amount, "deposit"
+        if services.should_deposit(
+            game_state.planet, bank_withdrawal, game_state.credits
+        ):
+            deposit_amount = (
+                game_state.credits if bank_withdrawal else game_state.credits * 0.5
             )
+            services.try_bank_transaction(game_state, deposit_amount, "deposit")
 
         # add notification
-        if bank_balance:
-            transactions.append(f"Bank balance: {bank_balance}")
+        if game_state.bank_balance:
+            transactions.append(f"Bank balance: {game_state.bank_balance}")
 
         # buy cargo bays
-        if services.can_buy_bays(planet, cargo_bays) and services.should_buy_bays(
-            turns_left, cargo_to_buy, game_credits
+        if services.can_buy_bays(
+            game_state.planet, game_state.cargo_bays
+        ) and services.should_buy_bays(
+            game_state.turns_left, cargo_to_buy, game_state.credits
         ):
-            game_credits, cargo_bays, cargo_bays_used, bays_bought = services.try_buy_bays(
-                game_id, game_credits, cargo_bays
-            )
+            bays_bought = services.try_buy_bays(game_state)
 
             # add notification
             if bays_bought:
@@ -112,71 +128,89 @@ while not end_play:
 
             # bought more bays, try to buy cargo again
             cargo_to_buy = services.choose_cargo_to_buy(
-                market, game_credits, cargo_bays_used, cargo_bays
+                game_state.market,
+                game_state.credits,
+                game_state.used_bays,
+                game_state.cargo_bays,
             )
             if cargo_to_buy:
-                game_credits, hold, cargo_amount_bought = services.try_buy_cargo(
-                    game_id,
-                    cargo_to_buy,
-                    market,
-                    game_credits,
-                    cargo_bays_used,
-                    cargo_bays,
-                )
+                cargo_price = game_state.market[cargo_to_buy]
+                cargo_amount_bought = services.try_buy_cargo(game_state, cargo_to_buy)
 
                 # add notification
                 if cargo_amount_bought:
                     transactions.append(
-                        f"Bought {cargo_amount_bought} {cargo_to_buy} at {market[cargo_to_buy]} each"
+                        f"Bought {cargo_amount_bought} {cargo_to_buy} "
+                        f"at {cargo_price} each"
                     )
 
-        # print data
-        print("\nPlanet: ", planet)
-        print("Turns: ", turns_left, "\tCredits: ", game_credits)
-
-        for item in transactions:
-            print(item)
-
-        # # uncomment for market and hold data
-        # print("\nCargo:".ljust(15), "Market price:".ljust(15), "In hold:")
-        # for cargo, price in market.items():
-        #     in_hold = "-" if hold[cargo] == "0" else hold[cargo]
-        #     print(f"{cargo}:".ljust(15), f"{price}".ljust(15), in_hold)
+        # record turn summary
+        events.emit(
+            "turn",
+            game_id=game_state.game_id,
+            planet=game_state.planet,
+            turns_left=game_state.turns_left,
+            credits=game_state.credits,
+            transactions=transactions,
+        )
 
-        print("\n")
+        # market and hold data (recorded with --log-level DEBUG), copied since the
+        # state is updated in place before the event is written
+        if events.enabled(logging.DEBUG):
+            events.emit(
+                "market",
+                logging.DEBUG,
+                game_id=game_state.game_id,
+                market=dict(game_state.market),
+                hold=dict(game_state.hold),
+            )
 
         # endgame/travel
-        if turns_left > 1:
+        if game_state.turns_left > 1:
             # travel
             travel_planet = services.choose_planet(
-                planet, hold, loan, turns_left, cargo_bays
+                game_state.planet,
+                game_state.hold,
+                game_state.loan,
+                game_state.turns_left,
+                game_state.cargo_bays,
             )
-            game = services.try_travel(game_id, travel_planet)
+            # end the game on a failed travel (already reported by try_travel)
+            # rather than replaying the turn on the same planet
+            if not services.try_travel(game_state, travel_planet):
+                game_over = True
+                game_count += 1
         else:
             # endgame
-            sell_profit = services.sell_cargo(game_id, hold, market)
+            sell_profit = services.sell_cargo(game_state)
 
             # calculate score
-            final_credits = game_credits + sell_profit
-            final_score = final_credits - loan + bank_balance
-            print(
-                f"Sold cargo for a total of {sell_profit}\nFinal score: {final_score}"
-            )
+            final_score = game_state.credits - game_state.loan + game_state.bank_balance
 
             data_file.write(f"{final_score}\n")
 
             score = requests.post(
-                "https://skysmuggler.com/scores/submit", json={"gameId": game_id}
+                "https://skysmuggler.com/scores/submit",
+                json={"gameId": game_state.game_id},
             )
 
-            if score.status_code == 200 and "New" in score.json()["message"]:
+            high_score = score.status_code == 200 and "New" in score.json()["message"]
+            if high_score:
                 requests.post(
                     "https://skysmuggler.com/scores/update_name",
-                    json={"newName": "El Capitan", "gameId": game_id},
+                    json={
+                        "newName": "El Capitan",
+                        "gameId": game_state.game_id,
+                    },
                 )
-                print("***** High score achieved *****\n")
-            else:
-                print("***** End of game *****\n")
+
+            events.emit(
+                "game_end",
+                game_id=game_state.game_id,
+                sell_profit=sell_profit,
+                final_score=final_score,
+                high_score=high_score,
+            )
 
             game_over = True
             game_count += 1
@@ -188,5 +222,6 @@ while not end_play:
         game_over = False
 
 data_file.close()
+events.shutdown()
 
 # endregion
@@ -1,3 +1,5 @@
+import events
+import logging
 import random
 import requests
 
@@ -134,36 +136,6 @@ def choose_planet(
     return chosen_planet
 
 
-def get_game_data(game_object):
-    """
-    Parses game state data into variables from json object
-    :param game_object: a json object with game state data
-    :return: tuple of current (planet, credits, turns left, market, hold,
-    fuel purchases, loan, cargo bays, bank balance)
-    """
-    current_planet = game_object["gameState"]["planet"]
-    current_credits = game_object["gameState"]["credits"]
-    current_turns_left = game_object["gameState"]["turnsLeft"]
-    current_market = game_object["currentMarket"]
-    current_hold = game_object["gameState"]["currentHold"]
-    current_fuel_purchases = game_object["gameState"]["fuelPurchases"]
-    current_loan = game_object["gameState"]["loanBalance"]
-    current_cargo_bays = game_object["gameState"]["totalBays"]
-    current_bank_balance = game_object["gameState"]["bankBalance"]
-
-    return (
-        current_planet,
-        current_credits,
-        current_turns_left,
-        current_market,
-        current_hold,
-        current_fuel_purchases,
-        current_loan,
-        current_cargo_bays,
-        current_bank_balance,
-    )
-
-
 def is_low_market_event(current_market):
     """
     Determines if a low market event happened by looking at market prices and comparing to price limits
@@ -178,27 +150,44 @@ def is_low_market_event(current_market):
     return ""
 
 
-def sell_cargo(current_id, current_hold, current_market):
+def sell_cargo(current_state):
     """
     Sells all cargo in hold
-    :param current_id: a string holding the current game id
-    :param current_hold: dictionary of cargo:quantity keys and values
-    :param current_market: dictionary of cargo:price keys and values
+    :param current_state: GameState of the current game
     :return: total profit from selling cargo
     """
     current_profit = 0
 
-    for cargo_type, amount in current_hold.items():
+    # hold is updated in place as each sale is applied, so iterate over a copy
+    for cargo_type, amount in list(current_state.hold.items()):
         if amount:
-            requests.post(
+            cargo_price = current_state.market[cargo_type]
+            sell_transaction = requests.post(
                 web_base.format(action="trade"),
                 json={
-                    "gameId": current_id,
+                    "gameId": current_state.game_id,
                     "transaction": {"side": "sell", cargo_type: amount},
                 },
             )
 
-            current_profit += amount * current_market[cargo_type]
+            if sell_transaction.status_code == 200:
+                current_state.apply(sell_transaction.json())
+                current_profit += amount * cargo_price
+            else:
+                refresh_state(current_state)
+                events.emit(
+                    "transaction_error",
+                    logging.ERROR,
+                    action="Sell cargo",
+                    attempt=f"Tried to sell {amount} {cargo_type} at {cargo_price}",
+                    state={
+                        "planet": current_state.planet,
+                        "credits": current_state.credits,
+                        "usedBays": current_state.used_bays,
+                        "totalBays": current_state.cargo_bays,
+                    },
+                    hold=dict(current_state.hold),
+                )
 
     return current_profit
 
@@ -255,250 +244,213 @@ def should_repay_loan(current_planet, current_loan, current_low_cargo):
     return current_planet == "umbriel" and current_loan > 0 and not current_low_cargo
 
 
-def try_bank_transaction(current_id, current_transaction_amount, bank_action):
+def refresh_state(current_state):
+    """
+    Fetches the full game state from the server and applies it, used to resync after
+    a failed action
+    :param current_state: GameState of the current game
+    """
+    current_state.apply(
+        requests.get(
+            web_base.format(action="game_state"),
+            params={"gameId": current_state.game_id},
+        ).json()
+    )
+
+
+def try_bank_transaction(current_state, current_transaction_amount, bank_action):
     """
     Attempts to deposit all available credits to the bank
-    :param current_id: a string holding the current game id
+    :param current_state: GameState of the current game
     :param current_transaction_amount: amount of credits to complete bank transaction with
     :param bank_action: string name of bank action. Must either be "withdraw" or "deposit
-    :return: tuple of credits and bank balance
+    :return: True if the transaction was a success, else False
     """
-    deposit_transaction = requests.post(
+    bank_transaction = requests.post(
         web_base.format(action="bank"),
         json={
-            "gameId": current_id,
+            "gameId": current_state.game_id,
             "transaction": {"side": bank_action, "qty": current_transaction_amount},
         },
     )
 
-    if deposit_transaction.status_code == 200:
-        return (
-            deposit_transaction.json()["gameState"]["credits"],
-            deposit_transaction.json()["gameState"]["bankBalance"],
-        )
+    if bank_transaction.status_code == 200:
+        current_state.apply(bank_transaction.json())
+        return True
     else:
-        error_state = requests.get(
-            web_base.format(action="game_state"), params={"gameId": current_id}
-        ).json()
-        print(
-            f"""
-        **** Bank {bank_action} error! ****
-        Tried to {bank_action} {current_transaction_amount} credits
-        **** GAME ****
-        planet: {error_state["gameState"]["planet"]}
-        credits: {error_state["gameState"]["credits"]}
-        bankBalance: {error_state["gameState"]["bankBalance"]}
-        **** HOLD ****
-        narcotics: {error_state["gameState"]["currentHold"]["narcotics"]}
-        mining: {error_state["gameState"]["currentHold"]["mining"]}
-        medical: {error_state["gameState"]["currentHold"]["medical"]}
-        metal: {error_state["gameState"]["currentHold"]["metal"]}
-        weapons: {error_state["gameState"]["currentHold"]["weapons"]}
-        water: {error_state["gameState"]["currentHold"]["water"]}
-        """
-        )
-        return (
-            error_state["gameState"]["credits"],
-            error_state["gameState"]["bankBalance"],
+        refresh_state(current_state)
+        events.emit(
+            "transaction_error",
+            logging.ERROR,
+            action=f"Bank {bank_action}",
+            attempt=f"Tried to {bank_action} {current_transaction_amount} credits",
+            state={
+                "planet": current_state.planet,
+                "credits": current_state.credits,
+                "bankBalance": current_state.bank_balance,
+            },
+            hold=dict(current_state.hold),
         )
+        return False
 
 
-def try_buy_bays(current_id, current_credits, current_cargo_bays):
+def try_buy_bays(current_state):
     """
     Attempts to purchase half the amount of bays affordable
-    :param current_id: a string holding the current game id
-    :param current_credits: amount of available credits
-    :param current_cargo_bays: number of cargo bays acquired
-    :return: tuple of credits, cargo bays, used bays, and bays bought
+    :param current_state: GameState of the current game
+    :return: number of bays bought
     """
     cargo_bay_cost = 800
 
-    potential_bays = (current_credits // cargo_bay_cost) // 2
+    potential_bays = (current_state.credits // cargo_bay_cost) // 2
 
     bays_to_buy = (
         potential_bays
-        if (current_cargo_bays + potential_bays) <= 1000
-        else 1000 - current_cargo_bays
+        if (current_state.cargo_bays + potential_bays) <= 1000
+        else 1000 - current_state.cargo_bays
     )
 
     buy_transaction = requests.post(
         web_base.format(action="shipyard"),
-        json={"gameId": current_id, "transaction": {"side": "buy", "qty": bays_to_buy}},
+        json={
+            "gameId": current_state.game_id,
+            "transaction": {"side": "buy", "qty": bays_to_buy},
+        },
     )
 
     if buy_transaction.status_code == 200:
-        return (
-            buy_transaction.json()["gameState"]["credits"],
-            buy_transaction.json()["gameState"]["totalBays"],
-            buy_transaction.json()["gameState"]["usedBays"],
-            bays_to_buy,
-        )
+        current_state.apply(buy_transaction.json())
+        return bays_to_buy
     else:
-        error_state = requests.get(
-            web_base.format(action="game_state"), params={"gameId": current_id}
-        ).json()
-        print(
-            f"""
-        **** Buy bays error! ****
-        Tried to buy {bays_to_buy} bays
-        **** GAME ****
-        planet: {error_state["gameState"]["planet"]}
-        credits: {error_state["gameState"]["credits"]}
-        usedBays: {error_state["gameState"]["usedBays"]}
-        totalBays: {error_state["gameState"]["totalBays"]}
-        """
-        )
-        return (
-            error_state["gameState"]["credits"],
-            error_state["gameState"]["totalBays"],
-            error_state["gameState"]["usedBays"],
-            0,
+        refresh_state(current_state)
+        events.emit(
+            "transaction_error",
+            logging.ERROR,
+            action="Buy bays",
+            attempt=f"Tried to buy {bays_to_buy} bays",
+            state={
+                "planet": current_state.planet,
+                "credits": current_state.credits,
+                "usedBays": current_state.used_bays,
+                "totalBays": current_state.cargo_bays,
+            },
         )
+        return 0
 
 
-def try_buy_cargo(
-    current_id,
-    chosen_cargo,
-    current_market,
-    current_credits,
-    current_bays_used,
-    current_cargo_bays,
-):
+def try_buy_cargo(current_state, chosen_cargo):
     """
     Attempts to purchase given cargo
-    :param current_id: a string holding the current game id
+    :param current_state: GameState of the current game
     :param chosen_cargo: cargo to buy
-    :param current_market: dictionary of cargo:price keys and values
-    :param current_credits: amount of available credits
-    :param current_bays_used: number of cargo bays in use
-    :param current_cargo_bays: number of cargo bays acquired
-    :return: tuple of game credits, hold, and amount of cargo bought
+    :return: amount of cargo bought
     """
-    potential_cargo_amount = current_credits // current_market[chosen_cargo]
-    bays_available = current_cargo_bays - current_bays_used
+    cargo_price = current_state.market[chosen_cargo]
+    potential_cargo_amount = current_state.credits // cargo_price
+    bays_available = current_state.cargo_bays - current_state.used_bays
 
     cargo_amount = min(potential_cargo_amount, bays_available)
 
     buy_transaction = requests.post(
         web_base.format(action="trade"),
         json={
-            "gameId": current_id,
+            "gameId": current_state.game_id,
             "transaction": {"side": "buy", chosen_cargo: cargo_amount},
         },
     )
 
     if buy_transaction.status_code == 200:
-        return (
-            buy_transaction.json()["gameState"]["credits"],
-            buy_transaction.json()["gameState"]["currentHold"],
-            cargo_amount,
-        )
+        current_state.apply(buy_transaction.json())
+        return cargo_amount
     else:
-        error_state = requests.get(
-            web_base.format(action="game_state"), params={"gameId": current_id}
-        ).json()
-        print(
-            f"""
-        **** Buy cargo error! ****
-        Tried to buy {cargo_amount} {chosen_cargo} at {current_market[chosen_cargo]}
-        **** GAME ****
-        planet: {error_state["gameState"]["planet"]}
-        credits: {error_state["gameState"]["credits"]}
-        usedBays: {error_state["gameState"]["usedBays"]}
-        totalBays: {error_state["gameState"]["totalBays"]}
-        **** HOLD ****
-        narcotics: {error_state["gameState"]["currentHold"]["narcotics"]}
-        mining: {error_state["gameState"]["currentHold"]["mining"]}
-        medical: {error_state["gameState"]["currentHold"]["medical"]}
-        metal: {error_state["gameState"]["currentHold"]["metal"]}
-        weapons: {error_state["gameState"]["currentHold"]["weapons"]}
-        water: {error_state["gameState"]["currentHold"]["water"]}
-        """
-        )
-        return (
-            error_state["gameState"]["credits"],
-            error_state["gameState"]["currentHold"],
-            0,
+        refresh_state(current_state)
+        events.emit(
+            "transaction_error",
+            logging.ERROR,
+            action="Buy cargo",
+            attempt=f"Tried to buy {cargo_amount} {chosen_cargo} at {cargo_price}",
+            state={
+                "planet": current_state.planet,
+                "credits": current_state.credits,
+                "usedBays": current_state.used_bays,
+                "totalBays": current_state.cargo_bays,
+            },
+            hold=dict(current_state.hold),
         )
+        return 0
 
 
-def try_buy_fuel_cells(current_id, current_credits):
+def try_buy_fuel_cells(current_state):
     """
     Attempts to purchase fuel cells
-    :param current_id: a string holding the current game id
-    :param current_credits: amount of available credits
-    :return: tuple of transaction success and game credits
+    :param current_state: GameState of the current game
+    :return: True if the transaction was a success, else False
     """
     buy_transaction = requests.post(
         web_base.format(action="fueldepot"),
-        json={"gameId": current_id, "transaction": {"side": "buy", "qty": 5}},
+        json={
+            "gameId": current_state.game_id,
+            "transaction": {"side": "buy", "qty": 5},
+        },
     )
 
     if buy_transaction.status_code == 200:
-        return True, buy_transaction.json()["gameState"]["credits"]
+        current_state.apply(buy_transaction.json())
+        return True
     else:
-        print("Not enough credits for fuel cells")
-        return False, current_credits
+        events.emit("fuel_error", logging.ERROR, credits=current_state.credits)
+        return False
 
 
-def try_repay_loan(current_id, current_credits, current_loan):
+def try_repay_loan(current_state):
     """
     Attempts to repay the loan shark with available credits
-    :param current_id: a string holding the current game id
-    :param current_credits: amount of available credits
-    :param current_loan: number of credits owed to the loanshark
-    :return: tuple of game credits and outstanding loan amount
+    :param current_state: GameState of the current game
+    :return: amount of credits repaid
     """
     # TODO: consider a smarter way to repay loanshark
-    repay_amount = current_credits if current_loan > current_credits else current_loan
+    repay_amount = min(current_state.credits, current_state.loan)
 
     loan_transaction = requests.post(
         web_base.format(action="loanshark"),
         json={
-            "gameId": current_id,
+            "gameId": current_state.game_id,
             "transaction": {"side": "repay", "qty": repay_amount},
         },
     )
 
-    return (
-        loan_transaction.json()["gameState"]["credits"],
-        loan_transaction.json()["gameState"]["loanBalance"],
-    )
+    current_state.apply(loan_transaction.json())
 
+    return repay_amount
 
-def try_travel(current_id, chosen_planet):
+
+def try_travel(current_state, chosen_planet):
     """
     Attempt to travel to planet passed in
-    :param current_id: a string holding the current game id
+    :param current_state: GameState of the current game
     :param chosen_planet: planet to travel to
-    :return: json object of game data if transaction was a success, else print
-    error message and return None
+    :return: True if the transaction was a success, else emit an error event and
+    return False
     """
     travel_transaction = requests.post(
         web_base.format(action="travel"),
-        json={"gameId": current_id, "toPlanet": chosen_planet},
+        json={"gameId": current_state.game_id, "toPlanet": chosen_planet},
     )
 
     if travel_transaction.status_code == 200:
-        return travel_transaction.json()
+        current_state.apply(travel_transaction.json())
+        return True
     else:
-        error_state = requests.get(
-            web_base.format(action="game_state"), params={"gameId": current_id}
-        ).json()
-        print(
-            f"""
-        **** Travel error! ****
-        Tried to travel to {chosen_planet}
-        **** GAME ****
-        planet: {error_state["gameState"]["planet"]}
-        credits: {error_state["gameState"]["credits"]}
-        **** HOLD ****
-        narcotics: {error_state["gameState"]["currentHold"]["narcotics"]}
-        mining: {error_state["gameState"]["currentHold"]["mining"]}
-        medical: {error_state["gameState"]["currentHold"]["medical"]}
-        metal: {error_state["gameState"]["currentHold"]["metal"]}
-        weapons: {error_state["gameState"]["currentHold"]["weapons"]}
-        water: {error_state["gameState"]["currentHold"]["water"]}
-        """
+        refresh_state(current_state)
+        events.emit(
+            "transaction_error",
+            logging.ERROR,
+            action="Travel",
+            attempt=f"Tried to travel to {chosen_planet}",
+            state={
+                "planet": current_state.planet,
+                "credits": current_state.credits,
+            },
+            hold=dict(current_state.hold),
         )
-        return None
+        return False
@@ -0,0 +1,70 @@
+# gameState keys mapped to GameState attribute names
+GAME_STATE_FIELDS = {
+    "planet": "planet",
+    "credits": "credits",
+    "turnsLeft": "turns_left",
+    "currentHold": "hold",
+    "fuelPurchases": "fuel_purchases",
+    "loanBalance": "loan",
+    "totalBays": "cargo_bays",
+    "usedBays": "used_bays",
+    "bankBalance": "bank_balance",
+}
+
+
+def _update_dict(current_dict, new_dict):
+    """
+    Updates a dictionary in place to match another
+    :param current_dict: dictionary to update
+    :param new_dict: dictionary holding the new keys and values
+    """
+    current_dict.update(new_dict)
+
+    for key in current_dict.keys() - new_dict.keys():
+        del current_dict[key]
+
+
+class GameState:
+    """
+    Single persistent copy of a game's state, updated in place from the responses to
+    each action
+    """
+
+    def __init__(self, game_object):
+        """
+        Creates the state for a new game
+        :param game_object: a json object with game id and game state data
+        """
+        self.game_id = game_object["gameId"]
+
+        self.planet = ""
+        self.credits = 0
+        self.turns_left = 0
+        self.market = {}
+        self.hold = {}
+        self.fuel_purchases = 0
+        self.loan = 0
+        self.cargo_bays = 0
+        self.used_bays = 0
+        self.bank_balance = 0
+
+        self.apply(game_object)
+
+    def apply(self, response):
+        """
+        Applies the fields present in an action response to the state
+        :param response: a json object with game state data (and optionally market data)
+        """
+        game_state = response.get("gameState", {})
+
+        for key, field in GAME_STATE_FIELDS.items():
+            if key not in game_state:
+                continue
+
+            if field == "hold":
+                _update_dict(self.hold, game_state[key])
+            else:
+                setattr(self, field, game_state[key])
+
+        if "currentMarket" in response:
+            _update_dict(self.market, response["currentMarket"])